@@ -12,15 +12,23 @@ import subprocess
 import shutil
 import argparse
 import json
+import re
 import http.server
-import socketserver
+import socket
 import threading
 import webbrowser
 import time
 import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+try:
+    import orjson  # type: ignore  # optional: faster deploy-info.json serialisation
+except ImportError:
+    orjson = None  # type: ignore
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -28,6 +36,116 @@ WEB_OUTPUT_DIR = PROJECT_ROOT / "zig-out" / "web"
 WEB_TEMPLATE_DIR = PROJECT_ROOT / "web"
 DEFAULT_PORT = 8080
 
+# Register WebAssembly-friendly MIME types once instead of per response
+mimetypes.add_type('application/wasm', '.wasm')
+mimetypes.add_type('application/javascript', '.js')
+
+# Single byte range, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-512"
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+# Default page used when the build doesn't provide its own index.html
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>MFS Engine - WebAssembly</title>
+    <style>
+        body { 
+            margin: 0; 
+            padding: 20px; 
+            background: linear-gradient(135deg, #1a1a1a, #2d2d2d); 
+            color: white; 
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
+            min-height: 100vh;
+        }
+        canvas { 
+            border: 2px solid #444; 
+            border-radius: 8px;
+            display: block; 
+            margin: 20px auto; 
+            box-shadow: 0 4px 8px rgba(0,0,0,0.3);
+        }
+        .info { 
+            text-align: center; 
+            margin: 20px; 
+        }
+        .status { 
+            padding: 10px; 
+            margin: 10px 0; 
+            border-radius: 4px; 
+            text-align: center; 
+        }
+        .loading { 
+            background: #333; 
+            border: 1px solid #555; 
+        }
+        .ready { 
+            background: #1a5a1a; 
+            border: 1px solid #2a7a2a; 
+        }
+        .error { 
+            background: #5a1a1a; 
+            border: 1px solid #7a2a2a; 
+        }
+        .footer { 
+            position: fixed; 
+            bottom: 10px; 
+            right: 10px; 
+            font-size: 0.8em; 
+            opacity: 0.7; 
+        }
+    </style>
+</head>
+<body>
+    <div class="info">
+        <h1>MFS Engine</h1>
+        <p>WebAssembly Build</p>
+        <div id="status" class="status loading">Loading...</div>
+    </div>
+    
+    <canvas id="canvas" width="800" height="600"></canvas>
+    
+    <div class="footer">
+        MFS Engine v1.0
+    </div>
+    
+    <script>
+        // WebAssembly loading and initialization
+        const statusDiv = document.getElementById('status');
+        const canvas = document.getElementById('canvas');
+        
+        function updateStatus(message, type = 'loading') {
+            statusDiv.textContent = message;
+            statusDiv.className = `status ${type}`;
+        }
+        
+        // Error handling
+        window.addEventListener('error', function(e) {
+            updateStatus(`Error: ${e.message}`, 'error');
+            console.error('Runtime error:', e);
+        });
+        
+        // WebAssembly module setup
+        window.Module = {
+            canvas: canvas,
+            onRuntimeInitialized: function() {
+                updateStatus('Engine ready!', 'ready');
+                console.log('MFS Engine initialized successfully');
+            },
+            onAbort: function(what) {
+                updateStatus('Engine failed to start', 'error');
+                console.error('Engine abort:', what);
+            },
+            printErr: function(text) { 
+                console.error('Engine Error:', text); 
+            }
+        };
+    </script>
+    <script src="mfs-web.js"></script>
+</body>
+</html>"""
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -37,7 +155,11 @@ class WebBuildError(Exception):
     pass
 
 def run_command(cmd: List[str], cwd: Optional[Path] = None, capture_output: bool = True) -> subprocess.CompletedProcess:
-    """Run a command and return the result"""
+    """Run a command and return the result
+
+    Captured output is kept as bytes and only decoded when needed; without
+    capture the child writes straight to the terminal.
+    """
     try:
         logger.debug(f"Running command: {' '.join(cmd)}")
         if cwd:
@@ -47,22 +169,21 @@ def run_command(cmd: List[str], cwd: Optional[Path] = None, capture_output: bool
             cmd,
             cwd=cwd,
             capture_output=capture_output,
-            text=True,
             check=True
         )
 
         if not capture_output:
             logger.debug("Command completed successfully")
-        else:
-            logger.debug(f"Command output: {result.stdout}")
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Command output: {result.stdout.decode(errors='replace')}")
 
         return result
     except subprocess.CalledProcessError as e:
         error_msg = f"Command failed: {' '.join(cmd)}"
         if e.stderr:
-            error_msg += f"\nError output: {e.stderr}"
+            error_msg += f"\nError output: {e.stderr.decode(errors='replace')}"
         if e.stdout:
-            error_msg += f"\nStandard output: {e.stdout}"
+            error_msg += f"\nStandard output: {e.stdout.decode(errors='replace')}"
         raise WebBuildError(error_msg)
 
 def check_dependencies():
@@ -72,7 +193,7 @@ def check_dependencies():
     # Check for zig
     try:
         result = run_command(["zig", "version"])
-        logger.info(f"✓ Zig found: {result.stdout.strip()}")
+        logger.info(f"✓ Zig found: {result.stdout.decode().strip()}")
     except (FileNotFoundError, WebBuildError):
         raise WebBuildError("Zig compiler not found. Please install Zig and add it to your PATH.")
 
@@ -107,11 +228,16 @@ def clean_build():
 
     logger.info("✓ Clean completed")
 
-def build_for_web(optimize: str = "Debug", extra_args: Optional[List[str]] = None):
-    """Build the engine for WebAssembly"""
+def _collect_build_outputs() -> Dict[str, os.DirEntry]:
+    """Scan WEB_OUTPUT_DIR once; DirEntry caches the stat results"""
+    with os.scandir(WEB_OUTPUT_DIR) as entries:
+        return {entry.name: entry for entry in entries if entry.is_file()}
+
+def build_for_web(optimize: str = "Debug", extra_args: Optional[List[str]] = None) -> Dict[str, os.DirEntry]:
+    """Build the engine for WebAssembly and return the output directory entries"""
     logger.info(f"Building for WebAssembly (optimization: {optimize})...")
 
-    cmd = ["zig", "build", "web", f"-Doptimize={optimize}"]
+    cmd = ["zig", "build", "web", f"-j{os.cpu_count() or 1}", f"-Doptimize={optimize}"]
 
     if extra_args:
         cmd.extend(extra_args)
@@ -126,13 +252,14 @@ def build_for_web(optimize: str = "Debug", extra_args: Optional[List[str]] = Non
     if not WEB_OUTPUT_DIR.exists():
         raise WebBuildError(f"Output directory not found: {WEB_OUTPUT_DIR}")
 
+    outputs = _collect_build_outputs()
     required_files = ["mfs-web.wasm", "mfs-web.js"]
     for file in required_files:
-        file_path = WEB_OUTPUT_DIR / file
-        if not file_path.exists():
-            raise WebBuildError(f"Required output file not found: {file_path}")
+        if file not in outputs:
+            raise WebBuildError(f"Required output file not found: {WEB_OUTPUT_DIR / file}")
 
     logger.info("✓ Build verification completed")
+    return outputs
 
 def setup_web_files():
     """Setup additional web files"""
@@ -143,10 +270,28 @@ def setup_web_files():
 
     # Copy template files if they exist
     if WEB_TEMPLATE_DIR.exists():
-        for file in WEB_TEMPLATE_DIR.iterdir():
-            if file.is_file():
-                shutil.copy2(file, WEB_OUTPUT_DIR)
-                logger.info(f"✓ Copied {file.name}")
+        pending = []
+        with os.scandir(WEB_TEMPLATE_DIR) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                # copy2 preserves mtime, so matching mtime+size means unchanged
+                src_stat = entry.stat()
+                try:
+                    dst_stat = (WEB_OUTPUT_DIR / entry.name).stat()
+                    if (dst_stat.st_mtime_ns, dst_stat.st_size) == (src_stat.st_mtime_ns, src_stat.st_size):
+                        continue
+                except FileNotFoundError:
+                    pass
+                pending.append(entry.path)
+
+        def copy_template_file(src):
+            shutil.copy2(src, WEB_OUTPUT_DIR)
+            logger.info(f"✓ Copied {os.path.basename(src)}")
+
+        # File copies release the GIL, so threads overlap them
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(copy_template_file, pending))
     
     # Create basic HTML if it doesn't exist
     html_file = WEB_OUTPUT_DIR / "index.html"
@@ -158,129 +303,37 @@ def setup_web_files():
 def create_basic_html():
     """Create a basic HTML file for the WebAssembly build"""
     logger.info("Creating basic HTML file...")
-    
-    html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>MFS Engine - WebAssembly</title>
-    <style>
-        body { 
-            margin: 0; 
-            padding: 20px; 
-            background: linear-gradient(135deg, #1a1a1a, #2d2d2d); 
-            color: white; 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-            min-height: 100vh;
-        }
-        canvas { 
-            border: 2px solid #444; 
-            border-radius: 8px;
-            display: block; 
-            margin: 20px auto; 
-            box-shadow: 0 4px 8px rgba(0,0,0,0.3);
-        }
-        .info { 
-            text-align: center; 
-            margin: 20px; 
-        }
-        .status { 
-            padding: 10px; 
-            margin: 10px 0; 
-            border-radius: 4px; 
-            text-align: center; 
-        }
-        .loading { 
-            background: #333; 
-            border: 1px solid #555; 
-        }
-        .ready { 
-            background: #1a5a1a; 
-            border: 1px solid #2a7a2a; 
-        }
-        .error { 
-            background: #5a1a1a; 
-            border: 1px solid #7a2a2a; 
-        }
-        .footer { 
-            position: fixed; 
-            bottom: 10px; 
-            right: 10px; 
-            font-size: 0.8em; 
-            opacity: 0.7; 
-        }
-    </style>
-</head>
-<body>
-    <div class="info">
-        <h1>MFS Engine</h1>
-        <p>WebAssembly Build</p>
-        <div id="status" class="status loading">Loading...</div>
-    </div>
-    
-    <canvas id="canvas" width="800" height="600"></canvas>
-    
-    <div class="footer">
-        MFS Engine v1.0
-    </div>
-    
-    <script>
-        // WebAssembly loading and initialization
-        const statusDiv = document.getElementById('status');
-        const canvas = document.getElementById('canvas');
-        
-        function updateStatus(message, type = 'loading') {
-            statusDiv.textContent = message;
-            statusDiv.className = `status ${type}`;
-        }
-        
-        // Error handling
-        window.addEventListener('error', function(e) {
-            updateStatus(`Error: ${e.message}`, 'error');
-            console.error('Runtime error:', e);
-        });
-        
-        // WebAssembly module setup
-        window.Module = {
-            canvas: canvas,
-            onRuntimeInitialized: function() {
-                updateStatus('Engine ready!', 'ready');
-                console.log('MFS Engine initialized successfully');
-            },
-            onAbort: function(what) {
-                updateStatus('Engine failed to start', 'error');
-                console.error('Engine abort:', what);
-            },
-            printErr: function(text) { 
-                console.error('Engine Error:', text); 
-            }
-        };
-    </script>
-    <script src="mfs-web.js"></script>
-</body>
-</html>"""
-    
+
     with open(WEB_OUTPUT_DIR / "index.html", 'w') as f:
-        f.write(html_content)
+        f.write(HTML_TEMPLATE)
     logger.info("✓ Created basic HTML file")
 
-def verify_build():
-    """Verify that the build output exists"""
+def verify_build(outputs: Optional[Dict[str, os.DirEntry]] = None):
+    """Verify that the build output exists
+
+    Pass the entries returned by build_for_web to avoid rescanning the
+    output directory.
+    """
     logger.info("Verifying build output...")
-    
+
+    if outputs is None:
+        outputs = _collect_build_outputs()
+
     required_files = ["mfs-web.wasm", "mfs-web.js"]
     for file in required_files:
-        file_path = WEB_OUTPUT_DIR / file
-        if not file_path.exists():
-            raise WebBuildError(f"Required file not found: {file_path}")
-        
-        file_size = file_path.stat().st_size
+        entry = outputs.get(file)
+        if entry is None:
+            raise WebBuildError(f"Required file not found: {WEB_OUTPUT_DIR / file}")
+
+        file_size = entry.stat().st_size
         logger.info(f"✓ {file} ({file_size:,} bytes)")
-    
-    # Check if HTML file exists
+
+    # Check if HTML file exists; setup_web_files may have created it after the scan
+    html_entry = outputs.get("index.html")
     html_file = WEB_OUTPUT_DIR / "index.html"
-    if html_file.exists():
+    if html_entry is not None:
+        logger.info(f"✓ index.html ({html_entry.stat().st_size:,} bytes)")
+    elif html_file.exists():
         logger.info(f"✓ index.html ({html_file.stat().st_size:,} bytes)")
     else:
         logger.warning("⚠ index.html not found")
@@ -290,6 +343,12 @@ def verify_build():
 class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """HTTP request handler with CORS headers for WebAssembly"""
 
+    extensions_map = {
+        **http.server.SimpleHTTPRequestHandler.extensions_map,
+        '.wasm': 'application/wasm',
+        '.js': 'application/javascript',
+    }
+
     def end_headers(self):
         # Required headers for WebAssembly and WebGPU
         self.send_header('Cross-Origin-Embedder-Policy', 'require-corp')
@@ -297,36 +356,144 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
         self.send_header('Pragma', 'no-cache')
         self.send_header('Expires', '0')
+        self.send_header('Accept-Ranges', 'bytes')
         super().end_headers()
 
-    def guess_type(self, path):
-        mimetype, encoding = super().guess_type(path)
-        path_str = str(path)
-        if path_str.endswith('.wasm'):
-            return 'application/wasm'
-        elif path_str.endswith('.js'):
-            return 'application/javascript'
-        return mimetype
+    # (offset, length) of the body to send, set by send_head for range requests
+    _range = None
+
+    def send_head(self):
+        """Serve a single byte range if requested, otherwise the whole file"""
+        self._range = None
+        match = RANGE_RE.fullmatch(self.headers.get('Range', '').strip())
+        path = self.translate_path(self.path)
+        if not match or match.groups() == ('', '') or os.path.isdir(path):
+            return super().send_head()
+
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        size = os.fstat(f.fileno()).st_size
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1 if int(last) else -1
+
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self._range = (start, end - start + 1)
+        return f
+
+    def copyfile(self, source, outputfile):
+        """Send the file with zero-copy sendfile when both ends are real fds"""
+        offset, count = self._range or (0, None)
+        try:
+            in_fd = source.fileno()
+            out_fd = outputfile.fileno()
+        except (AttributeError, OSError):
+            in_fd = out_fd = None
+
+        if in_fd is None or not hasattr(os, 'sendfile'):
+            if self._range is None:
+                super().copyfile(source, outputfile)
+                return
+            source.seek(offset)
+            while count > 0:
+                chunk = source.read(min(count, 64 * 1024))
+                if not chunk:
+                    break
+                outputfile.write(chunk)
+                count -= len(chunk)
+            return
+
+        if count is None:
+            count = os.fstat(in_fd).st_size
+        outputfile.flush()
+        while count > 0:
+            sent = os.sendfile(out_fd, in_fd, offset, count)
+            if sent == 0:
+                break
+            offset += sent
+            count -= sent
+
+    def log_request(self, code='-', size='-'):
+        """Only log successful requests when the server runs verbose"""
+        if getattr(self.server, 'verbose', False):
+            super().log_request(code, size)
 
     def log_message(self, format, *args):
         """Override to reduce server log noise"""
         # Only log errors and important requests
-        if not any(x in args[0] for x in ['favicon.ico', '.map'] if args):
+        first = args[0] if args and isinstance(args[0], str) else ''
+        if 'favicon.ico' not in first and '.map' not in first:
             super().log_message(format, *args)
 
-def find_available_port(start_port: int = DEFAULT_PORT, max_attempts: int = 10) -> int:
-    """Find an available port starting from start_port"""
-    import socket
-    for port in range(start_port, start_port + max_attempts):
+class DevHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server that caps the number of in-flight requests"""
+
+    # SO_REUSEADDR lets a Windows bind take over an active listener
+    allow_reuse_address = os.name != 'nt'
+    request_queue_size = 128
+
+    def __init__(self, *args, verbose: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verbose = verbose
+        # Handlers still run on the inherited daemon threads, so idle
+        # keep-alive connections can't block interpreter exit
+        self._slots = threading.BoundedSemaphore(min(32, (os.cpu_count() or 1) * 4))
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('localhost', port))
-                return port
-        except OSError:
-            continue
-    raise WebBuildError(f"Could not find available port in range {start_port}-{start_port + max_attempts}")
+            super().process_request(request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
 
-def start_dev_server(port: int = DEFAULT_PORT, open_browser: bool = True):
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+def find_available_port(start_port: int = DEFAULT_PORT, max_attempts: int = 10) -> int:
+    """Find an available port starting from start_port
+
+    Probes with a single socket using the same SO_REUSEADDR setting as
+    DevHTTPServer, so ports lingering in TIME_WAIT aren't rejected. If the
+    whole range is taken, the kernel assigns a free port.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        if DevHTTPServer.allow_reuse_address:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # A failed bind leaves the socket unbound, so it can be retried
+        for port in [*range(start_port, start_port + max_attempts), 0]:
+            try:
+                s.bind(('', port))
+                return s.getsockname()[1]
+            except OSError as e:
+                error = e
+    # Only reached if even a kernel-assigned port could not be bound
+    raise WebBuildError(f"Could not bind any local port: {error}")
+
+def start_dev_server(port: int = DEFAULT_PORT, open_browser: bool = True, verbose: bool = False):
     """Start a development server"""
     logger.info(f"Starting development server on port {port}...")
     
@@ -334,11 +501,10 @@ def start_dev_server(port: int = DEFAULT_PORT, open_browser: bool = True):
         raise WebBuildError(f"Web output directory not found: {WEB_OUTPUT_DIR}")
     
     # Find available port
-    try:
-        port = find_available_port(port)
-    except WebBuildError:
-        logger.warning(f"Port {port} not available, trying to find alternative...")
-        port = find_available_port(port + 1)
+    requested_port = port
+    port = find_available_port(port)
+    if port != requested_port:
+        logger.warning(f"Port {requested_port} not available, using {port} instead")
     
     original_cwd = os.getcwd()
     
@@ -346,7 +512,7 @@ def start_dev_server(port: int = DEFAULT_PORT, open_browser: bool = True):
         os.chdir(WEB_OUTPUT_DIR)
         
         # Start server
-        with socketserver.TCPServer(("", port), CORSHTTPRequestHandler) as httpd:
+        with DevHTTPServer(("", port), CORSHTTPRequestHandler, verbose=verbose) as httpd:
             server_url = f"http://localhost:{port}"
             logger.info(f"✓ Server running at {server_url}")
             logger.info("Press Ctrl+C to stop the server")
@@ -387,6 +553,14 @@ def create_deployment_package():
 
     shutil.copytree(WEB_OUTPUT_DIR, package_dir)
 
+    # One directory scan; DirEntry caches stat results after is_file()
+    files, total_size = [], 0
+    with os.scandir(package_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.append(entry.name)
+                total_size += entry.stat().st_size
+
     # Create deployment info
     try:
         build_time = datetime.now().isoformat()
@@ -397,8 +571,8 @@ def create_deployment_package():
         "engine": "MFS Engine",
         "version": "1.0.0",
         "build_time": build_time,
-        "files": [f.name for f in package_dir.iterdir() if f.is_file()],
-        "total_size_mb": sum(f.stat().st_size for f in package_dir.iterdir() if f.is_file()) / (1024 * 1024),
+        "files": files,
+        "total_size_mb": total_size / (1024 * 1024),
         "deployment_notes": {
             "requirements": [
                 "HTTPS required for WebGPU and SharedArrayBuffer",
@@ -428,8 +602,12 @@ def create_deployment_package():
         }
     }
 
-    with open(package_dir / "deploy-info.json", 'w', encoding='utf-8') as f:
-        json.dump(deploy_info, f, indent=2)
+    deploy_info_path = package_dir / "deploy-info.json"
+    if orjson is not None:
+        deploy_info_path.write_bytes(orjson.dumps(deploy_info, option=orjson.OPT_INDENT_2))
+    else:
+        with open(deploy_info_path, 'w', encoding='utf-8') as f:
+            json.dump(deploy_info, f, indent=2)
 
     # Create a simple README for deployment
     readme_content = """# MFS Engine WebAssembly Deployment
@@ -499,13 +677,13 @@ Examples:
             clean_build()
 
         # Build for web
-        build_for_web(args.optimize, args.build_args)
+        outputs = build_for_web(args.optimize, args.build_args)
 
         # Setup web files
         setup_web_files()
 
         # Verify build
-        verify_build()
+        verify_build(outputs)
 
         # Create deployment package if requested
         if args.deploy:
@@ -513,7 +691,7 @@ Examples:
 
         # Start development server unless disabled
         if not args.no_server:
-            start_dev_server(args.port, not args.no_browser)
+            start_dev_server(args.port, not args.no_browser, args.verbose)
 
         logger.info("✓ Build process completed successfully!")
 
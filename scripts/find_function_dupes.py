@@ -7,11 +7,21 @@ How it works
 1. Recursively walks the `src/` tree (or an optional path argument).
 2. Extracts every `pub fn` or `fn` declaration *along with* its body using a
    simple brace-depth tracker (fast but assumes balanced braces).
-3. Normalises whitespace to compact the body and hashes it using `ssdeep`.
-4. Compares each pair of hashes.  Pairs with a similarity > 90 % are reported
-   as potential duplicates.
+3. Tokenises the body, dropping comments and formatting, renaming local
+   identifiers to `v0, v1, ...` and numbers to `N`, then hashes the token
+   stream twice: an exact xxh3 (or blake2b) digest and a fuzzy `ssdeep`
+   hash.  Steps 2–3 run per file across a process pool.
+4. Groups identical token streams by their exact digest, then buckets the
+   fuzzy hashes of the distinct bodies so only plausibly-similar pairs are
+   compared (shared 7-grams at compatible ssdeep block sizes, or MinHash LSH
+   for the difflib fallback).  Pairs with a similarity > 90 % are merged
+   into clusters.
 5. Writes a JSON report to `function_dupes.json`.
 
+Per-file results are cached in `.function_dupes_cache.json`, keyed by path
+and validated against mtime and size, so warm runs only re-scan files that
+changed.
+
 Usage
 -----
     python scripts/find_function_dupes.py               # analyse ./src
@@ -20,6 +30,8 @@ Usage
 Requirements
 ------------
     pip install ssdeep
+    pip install datasketch   # optional, speeds up the difflib fallback
+    pip install xxhash       # optional, faster exact-match digests
 
 The output JSON maps the *first* occurrence of a function (file, name) tuple
 onto a list of other (file, name) tuples that look almost identical.
@@ -32,10 +44,33 @@ catch inadvertent copy-paste between backends, math helpers, etc.
 from __future__ import annotations
 
 import json
+import mmap
+import os
 import pathlib
 import re
 import sys
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Set, Tuple
+
+# ---------------------------------------------------------------------------
+# Exact-match digest – xxh3 when available, stdlib blake2b otherwise
+# ---------------------------------------------------------------------------
+
+try:
+    import xxhash  # type: ignore
+
+    _EXACT_BACKEND = "xxh3"
+
+    def _exact(s: bytes) -> int:
+        return xxhash.xxh3_64(s).intdigest()
+
+except ModuleNotFoundError:  # pragma: no cover – stdlib fallback
+    import hashlib
+
+    _EXACT_BACKEND = "blake2b"
+
+    def _exact(s: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(s, digest_size=16).digest(), "big")
 
 # ---------------------------------------------------------------------------
 # Optional ssdeep fuzzy hashing – falls back to stdlib difflib if unavailable
@@ -44,24 +79,132 @@ from typing import Dict, List, Tuple
 try:
     import ssdeep  # type: ignore
 
-    def _hash(s: str) -> str:  # noqa: D401 – opaque hash token
+    _FUZZY_BACKEND = "ssdeep"
+
+    def _hash(s: bytes) -> str:  # noqa: D401 – opaque hash token
         return ssdeep.hash(s)
 
     def _similar(a: str, b: str) -> int:
         return ssdeep.compare(a, b)
 
+    # libfuzzy trims runs of 4+ identical characters to 3 before comparing
+    _RUN_RE = re.compile(r"(.)\1{3,}")
+
+    def _hash_keys(bs: int, half: str) -> Set[Tuple[int, str]]:
+        """Return the bucket keys for one half of an ssdeep hash."""
+        half = _RUN_RE.sub(r"\1\1\1", half)
+        if len(half) < 7:
+            # too short for a 7-gram; identical hashes still score 100
+            return {(bs, half)}
+        return {(bs, half[k:k + 7]) for k in range(len(half) - 6)}
+
+    def _candidate_pairs(sigs: List[str]) -> Iterable[Tuple[int, int]]:
+        """Yield index pairs sharing a 7-gram at a compatible block size.
+
+        A hash `bs:h1:h2` carries `h1` at block size `bs` and `h2` at `2*bs`.
+        ssdeep.compare scores 0 unless two hashes are identical or share a
+        7-char substring at an equal block size, so this follows libfuzzy's
+        own prefilter closely; it is a candidate filter, not a guarantee.
+        """
+        buckets: Dict[Tuple[int, str], List[int]] = {}
+        for idx, sig in enumerate(sigs):
+            bs_str, h1, h2 = sig.split(":", 2)
+            bs = int(bs_str)
+            keys = _hash_keys(bs, h1) | _hash_keys(bs * 2, h2)
+            for key in keys:
+                buckets.setdefault(key, []).append(idx)
+
+        seen: Set[Tuple[int, int]] = set()
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pair = (members[a], members[b])
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
 except ModuleNotFoundError:  # pragma: no cover – pure-python fallback
     from difflib import SequenceMatcher
 
-    def _hash(s: str) -> str:
-        """Return the input itself – hashes aren't needed for the fallback."""
-        return s
+    _FUZZY_BACKEND = "difflib"
+
+    def _hash(s: bytes) -> str:
+        """Return the decoded input – hashes aren't needed for the fallback."""
+        return s.decode("utf-8", "replace")
 
     def _similar(a: str, b: str) -> int:
         """Return similarity percentage using difflib's quick_ratio."""
         return int(SequenceMatcher(None, a, b).ratio() * 100)
 
-FUNC_RE = re.compile(r"(?:pub\\s+)?fn\\s+(\\w+)\\s*\\([^)]*\\)\\s*\\{")
+    try:
+        from datasketch import MinHash, MinHashLSH  # type: ignore
+
+        def _candidate_pairs(sigs: List[str]) -> Iterable[Tuple[int, int]]:
+            """Yield index pairs whose 5-gram shingles collide in MinHash LSH."""
+            # The threshold is a recall knob, not the similarity cutoff:
+            # Jaccard over 5-grams sits well below difflib's ratio for the
+            # same pair, so it is kept loose and _similar() still decides
+            lsh = MinHashLSH(threshold=0.5, num_perm=64)
+            # copies of an empty seed share its permutations instead of
+            # regenerating them for every body
+            seed = MinHash(num_perm=64)
+            for idx, body in enumerate(sigs):
+                mh = seed.copy()
+                mh.update_batch(
+                    [body[k:k + 5].encode("utf-8") for k in range(max(len(body) - 4, 1))]
+                )
+                for other in lsh.query(mh):
+                    yield other, idx
+                lsh.insert(idx, mh)
+
+    except ModuleNotFoundError:
+
+        def _candidate_pairs(sigs: List[str]) -> Iterable[Tuple[int, int]]:
+            """Yield every index pair – no index is available without datasketch."""
+            for a in range(len(sigs)):
+                for b in range(a + 1, len(sigs)):
+                    yield a, b
+
+CACHE_PATH = pathlib.Path(".function_dupes_cache.json")
+# bump whenever extraction or normalisation changes what gets hashed
+CACHE_VERSION = 2
+
+# `[^{;]*` skips the return type between the parameter list and the body
+FUNC_RE = re.compile(rb"(?:pub\s+)?fn\s+(\w+)\s*\([^)]*\)[^{;]*\{")
+BRACE_RE = re.compile(rb"[{}]")
+# a `{` opening a type in the return type (`struct {...}`, `error{...}!T`,
+# `union(enum) {...}`) rather than the function body
+TYPE_BRACE_RE = re.compile(
+    rb"\b(?:struct|enum|union|opaque|error)\s*(?:\((?:[^()]|\([^()]*\))*\))?\s*$"
+)
+BODY_OR_END_RE = re.compile(rb"[{;]")
+# one alternative per token class; no groups, so findall returns bare tokens
+TOKEN_RE = re.compile(
+    rb"//[^\n]*"  # comment
+    rb"|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|\\\\[^\n]*"  # string / char
+    rb"|0[xXoObB][0-9a-fA-F_]+|\d[\d_]*(?:\.[\d_]+)?(?:[eEpP][+-]?\d+)?"  # number
+    rb"|@?[A-Za-z_]\w*"  # identifier / @builtin
+    rb"|\S"  # operator / punctuation
+)
+IDENT_START = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_")
+DIGITS = frozenset(b"0123456789")
+# keywords, primitive types and literals that carry structure, kept verbatim
+ZIG_RESERVED = frozenset(
+    b"""
+    addrspace align allowzero and anyframe anytype asm async await break
+    callconv catch comptime const continue defer else enum errdefer error
+    export extern fn for if inline linksection noalias noinline nosuspend
+    opaque or orelse packed pub resume return struct suspend switch test
+    threadlocal try union unreachable usingnamespace var volatile while
+    isize usize c_char c_short c_ushort c_int c_uint c_long c_ulong
+    c_longlong c_ulonglong c_longdouble f16 f32 f64 f80 f128 bool anyopaque
+    void noreturn type anyerror comptime_int comptime_float
+    true false null undefined
+    """.split()
+)
+# seed for normalize_body's rename table: reserved words map to themselves
+_RESERVED_NAMES: Dict[bytes, bytes] = {kw: kw for kw in ZIG_RESERVED}
+INT_TYPE_RE = re.compile(rb"[iu]\d+")
 
 # helpers
 # ---------------------------------------------------------------------------
@@ -76,27 +219,133 @@ def iter_zig_files(root: pathlib.Path):
         yield p
 
 
-def extract_functions(source: str) -> List[Tuple[str, str]]:
-    """Return list of (name, body) pairs"""
-    functions: List[Tuple[str, str]] = []
+def _find(parent: List[int], i: int) -> int:
+    """Return the union-find root of *i*, halving paths along the way."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def normalize_body(body: bytes) -> bytes:
+    """Return a canonical token stream for *body*.
+
+    Comments are dropped, numeric literals become `N` and every identifier
+    that isn't a keyword, primitive type or `@builtin` is renamed to `vK` in
+    order of first appearance, so clones differing only in naming or
+    formatting normalise to the same bytes.
+    """
+    # findall builds the token list in C; the loop below only classifies by
+    # first byte and does one dict lookup per identifier
+    names = _RESERVED_NAMES.copy()
+    renamed = 0
+    out: List[bytes] = []
+    append = out.append
+    int_type = INT_TYPE_RE.fullmatch
+    for tok in TOKEN_RE.findall(body):
+        first = tok[0]
+        if first in IDENT_START:
+            canon = names.get(tok)
+            if canon is None:
+                if int_type(tok):
+                    canon = tok
+                else:
+                    canon = b"v%d" % renamed
+                    renamed += 1
+                names[tok] = canon
+            append(canon)
+        elif first in DIGITS:
+            append(b"N")
+        elif tok[:2] != b"//":
+            append(tok)
+    return b" ".join(out)
+
+
+def match_braces(source: bytes | mmap.mmap) -> Dict[int, int]:
+    """Map each `{` offset to the offset just past its matching `}`."""
+    closes: Dict[int, int] = {}
+    stack: List[int] = []
+    for brace in BRACE_RE.finditer(source):
+        if brace.group() == b"{":
+            stack.append(brace.start())
+        elif stack:
+            closes[stack.pop()] = brace.end()
+    return closes
+
+
+def extract_functions(source: bytes | mmap.mmap) -> List[Tuple[str, bytes]]:
+    """Return list of (name, normalised body) pairs"""
+    # one brace pass per file, so nested functions don't rescan their parent
+    closes = match_braces(source)
+    functions: List[Tuple[str, bytes]] = []
     for m in FUNC_RE.finditer(source):
-        name = m.group(1)
+        name = m.group(1).decode("utf-8")
         start = m.start()
-        i = m.end()  # position after opening brace
-        depth = 1
-        while i < len(source) and depth:
-            if source[i] == '{':
-                depth += 1
-            elif source[i] == '}':
-                depth -= 1
-            i += 1
-        body = source[start:i]
-        # collapse whitespace to neutralise formatting differences
-        body_clean = re.sub(r"\\s+", " ", body).strip()
-        functions.append((name, body_clean))
+        brace = m.end() - 1
+        # step over braces belonging to the return type to reach the body
+        while TYPE_BRACE_RE.search(source[max(start, brace - 64):brace]):
+            after = closes.get(brace)
+            nxt = BODY_OR_END_RE.search(source, after) if after else None
+            if nxt is None or nxt.group() == b";":
+                brace = -1  # prototype or unbalanced type – no body
+                break
+            brace = nxt.start()
+        if brace < 0:
+            continue
+        # unbalanced braces run the body to end-of-file
+        end = closes.get(brace, len(source))
+        functions.append((name, normalize_body(source[start:end])))
     return functions
 
 
+# per-process memo so identical bodies are only fuzzy-hashed once per worker
+_FUZZY_BY_EXACT: Dict[int, str] = {}
+
+
+def process_file(path: str) -> List[Tuple[str, str, int, str]]:
+    """Return (path, name, exact, fuzzy) tuples for every function in *path*.
+
+    Runs inside the worker processes, so bodies are hashed here and never
+    pickled back to the parent.
+    """
+    # map the file rather than reading it: the regexes scan the page cache
+    # directly and only the sliced function bodies are copied onto the heap
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # mmap refuses empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as code:
+            functions = extract_functions(code)
+
+    out: List[Tuple[str, str, int, str]] = []
+    for name, body in functions:
+        exact = _exact(body)
+        fuzzy = _FUZZY_BY_EXACT.get(exact)
+        if fuzzy is None:
+            fuzzy = _FUZZY_BY_EXACT[exact] = _hash(body)
+        out.append((path, name, exact, fuzzy))
+    return out
+
+
+def _load_cache(path: pathlib.Path) -> Dict[str, dict]:
+    """Return cached per-file entries, or nothing if stale or unreadable."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    key = [CACHE_VERSION, _EXACT_BACKEND, _FUZZY_BACKEND]
+    if not isinstance(data, dict) or data.get("key") != key:
+        return {}
+    return data.get("files", {})
+
+
+def _save_cache(path: pathlib.Path, files: Dict[str, dict]) -> None:
+    """Atomically replace the cache file with *files*."""
+    data = {"key": [CACHE_VERSION, _EXACT_BACKEND, _FUZZY_BACKEND], "files": files}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
 # ---------------------------------------------------------------------------
 # main
 # ---------------------------------------------------------------------------
@@ -111,29 +360,72 @@ def main(argv: List[str] | None = None) -> None:  # pragma: no cover
         )
         sys.exit(1)
 
-    tokens: Dict[Tuple[str, str], str] = {}
-    for zig_file in iter_zig_files(root):
-        try:
-            code = zig_file.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            # skip binary or corrupted files
+    paths = [str(p) for p in iter_zig_files(root)]
+    cache = _load_cache(CACHE_PATH)
+    per_file: Dict[str, List[Tuple[str, str, int, str]]] = {}
+    stats: Dict[str, os.stat_result] = {}
+    stale: List[str] = []
+    for path in paths:
+        st = stats[path] = os.stat(path)
+        entry = cache.get(path)
+        if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            per_file[path] = [(path, n, e, f) for n, e, f in entry["functions"]]
+        else:
+            stale.append(path)
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for path, file_tokens in zip(
+                stale, executor.map(process_file, stale, chunksize=16)
+            ):
+                per_file[path] = file_tokens
+
+    # rebuilt from the current paths so deleted files and other roots drop out
+    fresh: Dict[str, dict] = {}
+    tokens: List[Tuple[str, str, int, str]] = []
+    for path in paths:
+        tokens.extend(per_file[path])
+        fresh[path] = {
+            "mtime": stats[path].st_mtime_ns,
+            "size": stats[path].st_size,
+            "functions": [[n, e, f] for _, n, e, f in per_file[path]],
+        }
+    _save_cache(CACHE_PATH, fresh)
+
+    # identical token streams join the first occurrence's group up front, so
+    # only one representative per distinct body reaches the fuzzy compare
+    parent = list(range(len(tokens)))
+    reps: List[int] = []
+    first_by_exact: Dict[int, int] = {}
+    for idx, (_, _, exact, _) in enumerate(tokens):
+        first = first_by_exact.setdefault(exact, idx)
+        if first == idx:
+            reps.append(idx)
+        else:
+            parent[idx] = first
+
+    # union-find over candidate pairs so transitive matches form one group
+    sigs = [tokens[r][3] for r in reps]
+    for a, b in _candidate_pairs(sigs):
+        i, j = reps[a], reps[b]
+        root_i, root_j = _find(parent, i), _find(parent, j)
+        if root_i == root_j:
             continue
-        for fn_name, body in extract_functions(code):
-            tokens[(str(zig_file), fn_name)] = _hash(body)
+        if _similar(sigs[a], sigs[b]) > 90:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for idx in range(len(tokens)):
+        groups.setdefault(_find(parent, idx), []).append(idx)
 
     clusters: Dict[str, List[Tuple[str, str]]] = {}
-    items = list(tokens.items())
-    total = len(items)
-    for i in range(total):
-        (file1, name1), sig1 = items[i]
-        for j in range(i + 1, total):
-            (file2, name2), sig2 = items[j]
-            score = _similar(sig1, sig2)
-            if score > 90:
-                clusters.setdefault(
-                    f"{file1}::{name1}",
-                    [],
-                ).append((file2, name2))
+    for root_idx, members in groups.items():
+        if len(members) < 2:
+            continue
+        file1, name1 = tokens[root_idx][:2]
+        clusters[f"{file1}::{name1}"] = [
+            (tokens[m][0], tokens[m][1]) for m in members if m != root_idx
+        ]
 
     out_path = pathlib.Path("function_dupes.json")
     out_path.write_text(json.dumps(clusters, indent=2))